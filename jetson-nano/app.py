@@ -7,10 +7,11 @@ Jetson Nano Baby Monitor Server
 
 import os
 import json
+import hashlib
 import time
 import threading
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from flask import Flask, request, jsonify, send_file, Response
 from flask_cors import CORS
 import cv2
@@ -53,6 +54,10 @@ sensor_data = {
 JETSON_MODEL = os.environ.get('JETSON_MODEL', 'Jetson Nano')
 GPU_MEMORY = os.environ.get('GPU_MEMORY', '4GB')
 
+# 카메라 / 스냅샷 설정
+CAMERA_TYPES = ['normal', 'infrared']
+SNAPSHOT_WIDTHS = (160, 320)
+
 class JetsonMonitor:
     """Jetson Nano 모니터링 클래스"""
     
@@ -135,6 +140,148 @@ class JetsonMonitor:
 # Jetson 모니터 인스턴스
 jetson_monitor = JetsonMonitor()
 
+class CachedFrame:
+    """인코딩된 JPEG 프레임과 썸네일 캐시"""
+    
+    def __init__(self, jpeg, etag, version):
+        self.jpeg = jpeg
+        self.etag = etag
+        self.version = version
+        # HTTP Last-Modified는 초 단위이므로 마이크로초 제거
+        self.captured_at = datetime.now(timezone.utc).replace(microsecond=0)
+        # 같은 초에 다른 프레임이 있었으면 Last-Modified만으로는 구분 불가
+        self.shares_second = False
+        self.thumbnails = {}
+        self.thumbnail_lock = threading.Lock()
+    
+    def get_thumbnail(self, width):
+        """너비별 썸네일 반환 (프레임당 너비별로 한 번만 축소 인코딩)"""
+        with self.thumbnail_lock:
+            thumbnail = self.thumbnails.get(width)
+            if thumbnail is None:
+                thumbnail = make_thumbnail(self.jpeg, width)
+                self.thumbnails[width] = thumbnail
+            return thumbnail
+
+
+class FrameCache:
+    """카메라별 최신 프레임 캐시
+    
+    카메라마다 하나의 캡처 스레드가 프레임을 한 번만 인코딩해 저장하고,
+    스트림과 스냅샷 요청은 저장된 JPEG를 그대로 재사용한다.
+    idle_timeout초 동안 요청이 없으면 캡처 스레드는 종료된다.
+    """
+    
+    def __init__(self, fps=10, idle_timeout=30):
+        self.interval = 1.0 / fps
+        self.idle_timeout = idle_timeout
+        self.frames = {}
+        self.threads = {}
+        self.last_access = {}
+        self.condition = threading.Condition()
+        self.version = 0
+    
+    def ensure_capture(self, camera_type):
+        """캡처 스레드가 없으면 시작"""
+        with self.condition:
+            self.last_access[camera_type] = time.monotonic()
+            if camera_type in self.threads:
+                return
+            thread = threading.Thread(target=self._capture_loop, args=(camera_type,), daemon=True)
+            self.threads[camera_type] = thread
+        thread.start()
+        logger.info(f"프레임 캡처 시작: {camera_type}")
+    
+    def _capture_loop(self, camera_type):
+        """프레임 캡처 및 JPEG 인코딩 루프"""
+        while True:
+            with self.condition:
+                idle = time.monotonic() - self.last_access.get(camera_type, 0)
+                if idle > self.idle_timeout:
+                    self.threads.pop(camera_type, None)
+                    self.frames.pop(camera_type, None)
+                    logger.info(f"프레임 캡처 중지 (유휴 {int(idle)}초): {camera_type}")
+                    return
+            try:
+                frame = capture_frame(camera_type)
+                ret, buffer = cv2.imencode('.jpg', frame)
+                if ret:
+                    self.publish(camera_type, buffer.tobytes())
+            except Exception as e:
+                logger.error(f"프레임 캡처 실패 ({camera_type}): {e}")
+            time.sleep(self.interval)
+    
+    def publish(self, camera_type, jpeg):
+        """새 프레임 저장 후 대기 중인 스트림 깨우기 (내용이 같으면 무시)"""
+        etag = hashlib.blake2b(jpeg, digest_size=16).hexdigest()
+        with self.condition:
+            current = self.frames.get(camera_type)
+            if current is not None and current.etag == etag:
+                return
+            self.version += 1
+            frame = CachedFrame(jpeg, etag, self.version)
+            if current is not None and current.captured_at == frame.captured_at:
+                frame.shares_second = True
+            self.frames[camera_type] = frame
+            self.condition.notify_all()
+    
+    def wait_for_frame(self, camera_type, last_version, timeout=1.0):
+        """last_version 이후의 새 프레임 대기"""
+        with self.condition:
+            self.last_access[camera_type] = time.monotonic()
+            self.condition.wait_for(
+                lambda: self._is_newer(camera_type, last_version), timeout=timeout)
+            frame = self.frames.get(camera_type)
+            if frame is None or frame.version == last_version:
+                return None
+            return frame
+    
+    def _is_newer(self, camera_type, last_version):
+        frame = self.frames.get(camera_type)
+        return frame is not None and frame.version != last_version
+    
+    def get_snapshot(self, camera_type, width=None):
+        """최신 프레임 (jpeg, etag, captured_at, shares_second) 반환, 없으면 None"""
+        with self.condition:
+            self.last_access[camera_type] = time.monotonic()
+            frame = self.frames.get(camera_type)
+        if frame is None:
+            return None
+        if width is None:
+            return frame.jpeg, frame.etag, frame.captured_at, frame.shares_second
+        return (frame.get_thumbnail(width), f'{frame.etag}-w{width}',
+                frame.captured_at, frame.shares_second)
+
+
+def capture_frame(camera_type):
+    """카메라 프레임 캡처 (시뮬레이션)"""
+    # 실제 카메라 캡처 구현 (여기에 구현)
+    # frame = get_camera_frame(camera_type)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.putText(frame, f'{camera_type.upper()} Camera', (50, 240), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+    cv2.putText(frame, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
+               (50, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return frame
+
+
+def make_thumbnail(jpeg, width):
+    """JPEG를 지정 너비로 축소 (원본보다 크면 원본 유지)"""
+    image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+    height, original_width = image.shape[:2]
+    if width >= original_width:
+        return jpeg
+    size = (width, max(1, round(height * width / original_width)))
+    resized = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    ret, buffer = cv2.imencode('.jpg', resized)
+    if not ret:
+        raise RuntimeError('썸네일 인코딩 실패')
+    return buffer.tobytes()
+
+
+# 카메라별 프레임 캐시 인스턴스
+frame_cache = FrameCache(fps=10, idle_timeout=30)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """건강 체크 엔드포인트"""
@@ -259,7 +406,7 @@ def switch_camera():
         data = request.get_json()
         camera_type = data.get('cameraType')
         
-        if camera_type not in ['normal', 'infrared']:
+        if camera_type not in CAMERA_TYPES:
             return jsonify({
                 'error': '유효하지 않은 카메라 타입입니다.'
             }), 400
@@ -341,36 +488,74 @@ def stop_recording():
 @app.route('/video/stream/<camera_type>')
 def video_stream(camera_type):
     """비디오 스트림 (MJPEG)"""
-    if camera_type not in ['normal', 'infrared']:
+    if camera_type not in CAMERA_TYPES:
         return jsonify({'error': '유효하지 않은 카메라 타입입니다.'}), 400
     
+    frame_cache.ensure_capture(camera_type)
+    
     def generate_frames():
-        """프레임 생성 (시뮬레이션)"""
+        """캐시된 최신 프레임 전송"""
+        last_version = None
         while True:
-            # 실제 카메라 스트림 구현 (여기에 구현)
-            # frame = get_camera_frame(camera_type)
-            
-            # 시뮬레이션 프레임
-            frame = np.zeros((480, 640, 3), dtype=np.uint8)
-            cv2.putText(frame, f'{camera_type.upper()} Camera', (50, 240), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            cv2.putText(frame, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 
-                       (50, 280), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            # JPEG 인코딩
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if not ret:
+            frame = frame_cache.wait_for_frame(camera_type, last_version)
+            if frame is None:
+                # 클라이언트가 오래 멈춰 있던 사이 캡처가 유휴 종료됐을 수 있음
+                frame_cache.ensure_capture(camera_type)
                 continue
+            last_version = frame.version
             
             # MJPEG 스트림 형식으로 전송
             yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-            
-            time.sleep(0.1)  # 10 FPS
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame.jpeg + b'\r\n')
     
     return Response(generate_frames(),
                    mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/video/snapshot/<camera_type>', methods=['GET'])
+def video_snapshot(camera_type):
+    """최신 프레임 스냅샷 (JPEG, 조건부 GET 지원)"""
+    if camera_type not in CAMERA_TYPES:
+        return jsonify({'error': '유효하지 않은 카메라 타입입니다.'}), 400
+    
+    width = request.args.get('width')
+    if width is not None:
+        if width not in [str(w) for w in SNAPSHOT_WIDTHS]:
+            return jsonify({
+                'error': f'width는 {", ".join(map(str, SNAPSHOT_WIDTHS))} 중 하나여야 합니다.'
+            }), 400
+        width = int(width)
+    
+    try:
+        frame_cache.ensure_capture(camera_type)
+        snapshot = frame_cache.get_snapshot(camera_type, width)
+        if snapshot is None:
+            # 캡처 스레드가 막 시작된 경우 첫 프레임을 잠시 대기
+            frame_cache.wait_for_frame(camera_type, None, timeout=1.0)
+            snapshot = frame_cache.get_snapshot(camera_type, width)
+        if snapshot is None:
+            response = jsonify({'error': '아직 캡처된 프레임이 없습니다. 잠시 후 다시 시도하세요.'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '1'
+            return response
+        
+        jpeg, etag, captured_at, shares_second = snapshot
+        response = Response(jpeg, mimetype='image/jpeg')
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        # 같은 초에 프레임이 바뀐 경우 If-Modified-Since로는 304를 주지 않음
+        if not shares_second:
+            response.last_modified = captured_at
+        response = response.make_conditional(request)
+        response.last_modified = captured_at
+        return response
+        
+    except Exception as e:
+        logger.error(f"스냅샷 조회 실패: {e}")
+        return jsonify({
+            'error': '스냅샷을 가져올 수 없습니다.',
+            'details': str(e)
+        }), 500
+
 @app.route('/download-audio', methods=['GET'])
 def download_audio():
     """오디오 파일 다운로드"""
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+스냅샷 엔드포인트 및 프레임 캐시 테스트
+"""
+
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as jetson_app
+
+
+@pytest.fixture
+def scene(monkeypatch):
+    """capture_frame을 고정 이미지로 대체 (scene['value']로 내용 변경)"""
+    state = {'value': 0, 'fail': False}
+
+    def fake_capture_frame(camera_type):
+        if state['fail']:
+            raise RuntimeError('camera offline')
+        return np.full((480, 640, 3), state['value'], dtype=np.uint8)
+
+    monkeypatch.setattr(jetson_app, 'capture_frame', fake_capture_frame)
+    monkeypatch.setattr(jetson_app, 'frame_cache', jetson_app.FrameCache(fps=50, idle_timeout=0.3))
+    return state
+
+
+@pytest.fixture
+def client(scene):
+    jetson_app.app.config['TESTING'] = True
+    return jetson_app.app.test_client()
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_snapshot_returns_jpeg_with_validators(client):
+    response = client.get('/video/snapshot/normal')
+    assert response.status_code == 200
+    assert response.mimetype == 'image/jpeg'
+    assert response.headers['ETag']
+    assert response.headers['Last-Modified']
+    assert response.data[:2] == b'\xff\xd8'
+
+
+def test_snapshot_if_none_match_returns_304(client):
+    first = client.get('/video/snapshot/normal')
+    second = client.get('/video/snapshot/normal',
+                        headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+    assert second.data == b''
+
+
+def test_snapshot_changed_frame_returns_200(client, scene):
+    first = client.get('/video/snapshot/normal')
+    scene['value'] = 200
+    assert wait_until(lambda: jetson_app.frame_cache.get_snapshot('normal')[1] != first.headers['ETag'].strip('"'))
+    second = client.get('/video/snapshot/normal',
+                        headers={'If-None-Match': first.headers['ETag'],
+                                 'If-Modified-Since': first.headers['Last-Modified']})
+    assert second.status_code == 200
+    assert second.headers['ETag'] != first.headers['ETag']
+
+
+def test_if_modified_since_returns_304_for_unchanged_frame(client, scene):
+    scene['fail'] = True
+    jetson_app.frame_cache.publish('normal', b'only')
+    response = client.get('/video/snapshot/normal',
+                          headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 304
+
+
+def test_if_modified_since_ignored_when_frame_changed_within_second(client, scene):
+    scene['fail'] = True
+    cache = jetson_app.frame_cache
+    cache.publish('normal', b'first')
+    cache.publish('normal', b'second')
+    if not cache.frames['normal'].shares_second:
+        pytest.skip('두 프레임이 서로 다른 초에 발행됨')
+    response = client.get('/video/snapshot/normal',
+                          headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
+    assert response.headers['Last-Modified']
+
+
+def test_duplicate_frame_is_not_republished():
+    cache = jetson_app.FrameCache()
+    cache.publish('normal', b'same')
+    frame = cache.frames['normal']
+    cache.publish('normal', b'same')
+    assert cache.frames['normal'] is frame
+
+
+@pytest.mark.parametrize('width', ['100', '640', 'abc', ''])
+def test_snapshot_rejects_unknown_width(client, width):
+    response = client.get(f'/video/snapshot/normal?width={width}')
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+
+def test_snapshot_invalid_camera_type(client):
+    response = client.get('/video/snapshot/thermal')
+    assert response.status_code == 400
+
+
+def test_snapshot_thumbnail_is_cached_per_frame(client, monkeypatch):
+    calls = []
+    original = jetson_app.make_thumbnail
+
+    def counting_make_thumbnail(jpeg, width):
+        calls.append(width)
+        return original(jpeg, width)
+
+    monkeypatch.setattr(jetson_app, 'make_thumbnail', counting_make_thumbnail)
+
+    first = client.get('/video/snapshot/normal?width=160')
+    second = client.get('/video/snapshot/normal?width=160')
+    assert first.status_code == 200
+    assert second.status_code == 200
+    assert calls == [160]
+    assert first.headers['ETag'].endswith('-w160"')
+
+    image = cv2.imdecode(np.frombuffer(first.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape[:2] == (120, 160)
+
+
+def test_snapshot_returns_503_without_frame(client, scene):
+    scene['fail'] = True
+    response = client.get('/video/snapshot/infrared')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_capture_stops_when_idle_and_restarts(client):
+    cache = jetson_app.frame_cache
+    assert client.get('/video/snapshot/normal').status_code == 200
+    assert 'normal' in cache.threads
+
+    assert wait_until(lambda: 'normal' not in cache.threads)
+    assert 'normal' not in cache.frames
+
+    assert client.get('/video/snapshot/normal').status_code == 200
+    assert 'normal' in cache.threads
+
+
+def test_stream_restarts_capture_after_idle_shutdown(client):
+    cache = jetson_app.frame_cache
+    response = client.get('/video/stream/normal', buffered=False)
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'--frame')
+
+    # 클라이언트가 읽지 않는 동안 캡처가 유휴 종료됨
+    assert wait_until(lambda: 'normal' not in cache.threads)
+
+    assert next(chunks).startswith(b'--frame')
+    assert 'normal' in cache.threads
+    response.close()